@@ -0,0 +1,99 @@
+import functools
+import os
+import numpy as np
+import torch
+from pathlib import Path
+from typing import List, Union
+from sentence_transformers import SentenceTransformer
+from .logger import setup_logger
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+except ImportError:  # optimum is optional; the PyTorch model is used instead
+    ORTModelForFeatureExtraction = None
+
+# Set up logger for this module
+logger = setup_logger("bank_llm.embedder", "embedder.log")
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_DIR = Path("onnx_int8")  # int8 export of MODEL_NAME, see README
+MAX_SEQ_LENGTH = 256          # Tokens per text, as in the sentence-transformers config
+
+# PyTorch's default intra-op thread count (one per logical CPU) oversubscribes
+# hyper-threaded cores; roughly one thread per physical core is faster
+TORCH_THREADS = max(1, (os.cpu_count() or 2) // 2)
+TORCH_INTEROP_THREADS = 2
+
+torch.set_num_threads(TORCH_THREADS)
+try:
+    torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+except RuntimeError:  # can only be set before the first parallel work in the process
+    pass
+
+class OnnxEncoder:
+    """
+    MODEL_NAME exported to ONNX with int8 weights, run on ONNX Runtime.
+
+    Implements the part of SentenceTransformer's interface the app uses:
+    mean pooling over the token embeddings followed by L2 normalization,
+    which is what the model's own pooling and normalize modules do.
+    """
+
+    def __init__(self, path: Path = ONNX_DIR):
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(path, provider="CPUExecutionProvider")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.config.hidden_size
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(texts, padding=True, truncation=True,
+                                max_length=MAX_SEQ_LENGTH, return_tensors="np")
+        # Given numpy inputs, optimum returns numpy outputs
+        hidden = self.model(**tokens).last_hidden_state
+        mask = tokens["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               convert_to_tensor: bool = False, **kwargs):
+        """Embed one text or a list of texts; embeddings are always normalized."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else sentences
+        embs = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            embs[start:start + batch_size] = self._encode_batch(texts[start:start + batch_size])
+        if single:
+            embs = embs[0]
+        return torch.from_numpy(embs) if convert_to_tensor else embs
+
+def _cpu_supports_bf16() -> bool:
+    """True if oneDNN has native bf16 kernels (AVX512-BF16 or AMX) on this CPU."""
+    try:
+        return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+def load_model() -> Union[OnnxEncoder, SentenceTransformer]:
+    """
+    Load the embedding model. The int8 ONNX export is used when it exists and
+    optimum is installed. Otherwise the PyTorch model is loaded in half
+    precision where the hardware runs it natively: fp16 on CUDA, bf16 on CPUs
+    with bf16 support. Other CPUs only emulate bf16, which is slower than
+    fp32, so the model is left as is.
+    """
+    if ORTModelForFeatureExtraction is not None and ONNX_DIR.is_dir():
+        logger.info(f"Loading int8 ONNX embedding model from {ONNX_DIR}")
+        return OnnxEncoder(ONNX_DIR)
+    model = SentenceTransformer(MODEL_NAME)
+    if model.device.type == "cuda":
+        model = model.half()
+    elif _cpu_supports_bf16():
+        model = model.to(torch.bfloat16)
+    return model.eval()
+
+@functools.lru_cache(maxsize=1)
+def get_model() -> Union[OnnxEncoder, SentenceTransformer]:
+    """The process-wide embedding model, loaded on first use and shared by ingestion and retrieval."""
+    return load_model()
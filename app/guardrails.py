@@ -1,18 +1,91 @@
+import hashlib
 import re
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from .logger import setup_logger
+from .regex_engine import PatternSet, compile_pattern, merge_candidates
+from . import numeric_pii
+
+try:
+    import hyperscan
+except ImportError:  # Hyperscan is optional; fall back to Python's re
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keywords then use re
+    ahocorasick = None
 
 # Set up logger for this module
 logger = setup_logger("bank_llm.guardrails", "guardrails.log")
 
-@dataclass
+# Results of up to this many distinct texts are kept for reuse
+_CACHE_SIZE = 4096
+# Longer texts are keyed by a digest instead of the text itself
+_CACHE_KEY_MAX_LEN = 1024
+
+@dataclass(frozen=True)
 class PolicyViolation:
     type: str
     description: str
     severity: str  # 'low', 'medium', 'high'
     context: Optional[str] = None
 
+class ViolationBatch:
+    """
+    Policy violations stored as parallel lists, one entry per violation.
+
+    PolicyViolation objects are only built when an item is accessed, so a
+    scan with many hits does not allocate one object per hit up front.
+    """
+
+    __slots__ = ('types', 'descriptions', 'severities', 'contexts')
+
+    def __init__(self):
+        self.types: List[str] = []
+        self.descriptions: List[str] = []
+        self.severities: List[str] = []
+        self.contexts: List[Optional[str]] = []
+
+    def append(self, vtype: str, description: str, severity: str, context: Optional[str] = None):
+        self.types.append(vtype)
+        self.descriptions.append(description)
+        self.severities.append(severity)
+        self.contexts.append(context)
+
+    def extend(self, other: 'ViolationBatch'):
+        self.types.extend(other.types)
+        self.descriptions.extend(other.descriptions)
+        self.severities.extend(other.severities)
+        self.contexts.extend(other.contexts)
+
+    def copy(self) -> 'ViolationBatch':
+        batch = ViolationBatch()
+        batch.extend(self)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return PolicyViolation(
+            type=self.types[index],
+            description=self.descriptions[index],
+            severity=self.severities[index],
+            context=self.contexts[index]
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"ViolationBatch({list(self)!r})"
+
 class ContentGuardrails:
     def __init__(self):
         # Sensitive information patterns
@@ -27,9 +100,6 @@ class ContentGuardrails:
             'iban': r'\b[A-Z]{2}\d{2}[A-Z0-9]{1,30}\b',
         }
 
-        # Compile all patterns
-        self.pattern_regex = re.compile('|'.join(f'(?P<{k}>{v})' for k, v in self.patterns.items()), flags=re.I)
-
         # Restricted keywords and phrases
         self.restricted_keywords = {
             'high_severity': [
@@ -56,122 +126,326 @@ class ContentGuardrails:
             ]
         }
 
-        # Compile keyword patterns
-        self.keyword_patterns = {
-            severity: re.compile('|'.join(f'\\b{kw}\\b' for kw in keywords), re.I)
-            for severity, keywords in self.restricted_keywords.items()
-        }
+        # Rule table shared by all engines: (violation type, label, severity).
+        # A rule's position is its priority when hits overlap and its
+        # Hyperscan expression id.
+        self._rules = []
+        self._groups = []
+        expressions = []
+        for pii_type, pattern in self.patterns.items():
+            self._rules.append(('sensitive_info', pii_type, 'high'))
+            self._groups.append(f'pii_{pii_type}')
+            expressions.append(pattern)
+        for severity, keywords in self.restricted_keywords.items():
+            for i, kw in enumerate(keywords):
+                self._rules.append(('restricted_keyword', kw, severity))
+                self._groups.append(f'kw_{severity}_{i}')
+                expressions.append(f'\\b{kw}\\b')
+        for i, pattern in enumerate(self.offensive_patterns['high_severity']):
+            self._rules.append(('offensive_language', None, 'high'))
+            self._groups.append(f'off_{i}')
+            expressions.append(pattern)
+        self._group_rules = {group: rule_id for rule_id, group in enumerate(self._groups)}
+        # Shortest text any rule can match. The shortest keywords ('pin',
+        # 'ssn', ...) set it; no PII or offensive pattern matches fewer chars.
+        self._min_pattern_len = min(len(kw) for kws in self.restricted_keywords.values() for kw in kws)
+
+        # One regex over every rule: a single pass finds all categories, and
+        # the name of the matching group identifies the rule. Every rule starts
+        # at a word boundary; testing it once up front lets re skip most positions.
+        self.combined = compile_pattern(
+            r'\b(?:' + '|'.join(f'(?P<{g}>{e})' for g, e in zip(self._groups, expressions)) + ')', re.I
+        )
+        # The same regex for text that was case-folded up front (see _fold),
+        # so matching does not fold every character again under re.I
+        folded_expressions = [e.replace('A-Z', 'a-z') for e in expressions]
+        self._folded_regex = compile_pattern(
+            r'\b(?:' + '|'.join(f'(?P<{g}>{e})' for g, e in zip(self._groups, folded_expressions)) + ')'
+        )
+
+        # One Aho-Corasick automaton over every keyword list; when available
+        # it replaces the keyword alternatives of the combined regex
+        self._keyword_automaton = None
+        if ahocorasick is not None:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for rule_id, (vtype, kw, severity) in enumerate(self._rules):
+                if vtype == 'restricted_keyword':
+                    self._keyword_automaton.add_word(kw.lower(), (rule_id, len(kw)))
+            self._keyword_automaton.make_automaton()
+            self._non_keyword_regex = compile_pattern(r'\b(?:' + '|'.join(
+                f'(?P<{g}>{e})' for g, e, rule in zip(self._groups, folded_expressions, self._rules)
+                if rule[0] != 'restricted_keyword'
+            ) + ')')
 
-        # Compile offensive patterns
-        self.offensive_regex = re.compile('|'.join(self.offensive_patterns['high_severity']), re.I)
+        # Compile every pattern into ONE Hyperscan database so a single pass
+        # over the input reports all categories at once
+        self._hs = None
+        if hyperscan is not None:
+            self._hs = PatternSet(expressions, re.I)
+            logger.info(f"Compiled {len(expressions)} guardrail patterns into a Hyperscan database")
+
+        # Digit-only PII patterns can be found by a compiled scanner; the regex
+        # run next to it then only holds the remaining rules. The scanner only
+        # handles phone numbers that start with a digit, so the regex keeps
+        # the '+' and '(' forms. With Hyperscan, the few texts it cannot take
+        # go to the plain regex engines, so the scanner is not JIT-compiled.
+        self._residual_regex = None
+        if numeric_pii.ENABLED and self._hs is None:
+            self._numeric_kinds = numeric_pii.numeric_kinds(self.patterns.items())
+            self._numeric_rules = [self._group_rules[f'pii_{k}'] for k in self._numeric_kinds]
+            residual = []
+            for g, e, (vtype, label, _) in zip(self._groups, folded_expressions, self._rules):
+                if vtype == 'restricted_keyword' and self._keyword_automaton is not None:
+                    continue
+                if vtype == 'sensitive_info' and label in self._numeric_kinds:
+                    if label != 'phone':
+                        continue
+                    e = numeric_pii.PREFIXED_PHONE
+                residual.append(f'(?P<{g}>{e})')
+            self._residual_regex = compile_pattern(r'\b(?:' + '|'.join(residual) + ')')
+            # JIT-compile the scanner now rather than on the first request
+            numeric_pii.find_numeric_pii('0', self._numeric_kinds)
+
+        # LRU cache of (sanitized text, violations) per input text. Patterns
+        # never change, so entries stay valid for the life of the instance.
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
 
         logger.info("ContentGuardrails initialized with security patterns and policies")
 
-    def check_sensitive_info(self, text: str) -> List[PolicyViolation]:
-        """Check for sensitive information patterns in text."""
-        violations = []
-        
-        # Check for PII patterns
-        for match in self.pattern_regex.finditer(text):
-            pii_type = match.lastgroup
-            context = text[max(0, match.start()-20):min(len(text), match.end()+20)]
-            violations.append(PolicyViolation(
-                type='sensitive_info',
-                description=f'Detected {pii_type}',
-                severity='high',
-                context=context
-            ))
-            logger.warning(f"Detected sensitive information ({pii_type}) in text")
+    def _scan(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Find all policy hits as (start, end, rule id), ordered by position.
 
-        return violations
+        Every engine reports the leftmost-first, non-overlapping set of hits
+        that ``self.combined.finditer`` produces.
+        """
+        # Fold case once; every engine below matches against the folded text
+        folded = _fold(text)
+        if folded is None:
+            return [(m.start(), m.end(), self._group_rules[m.lastgroup]) for m in self.combined.finditer(text)]
+        # Hyperscan's \s and \d are ASCII-only; text with other whitespace
+        # (e.g. U+00A0) or digits (e.g. U+FF11) goes to the engines below,
+        # which use re's
+        if self._hs is not None and self._hs.handles(text):
+            return self._hs_scan(text, folded)
+        candidates = None
+        if self._keyword_automaton is not None:
+            candidates, regex = self._match_keywords(text, folded), self._non_keyword_regex
+        # The numeric scanner works on bytes, so only where they are characters
+        if self._residual_regex is not None and folded.isascii():
+            numeric = [
+                (start, self._numeric_rules[kind], end)
+                for start, kind, end in numeric_pii.find_numeric_pii(folded, self._numeric_kinds)
+            ]
+            candidates, regex = sorted((candidates or []) + numeric), self._residual_regex
+        if candidates is not None:
+            return merge_candidates(folded, candidates, regex, self._group_rules)
+        return [(m.start(), m.end(), self._group_rules[m.lastgroup]) for m in self._folded_regex.finditer(folded)]
 
-    def check_restricted_keywords(self, text: str) -> List[PolicyViolation]:
-        """Check for restricted keywords and phrases."""
-        violations = []
-        
-        for severity, pattern in self.keyword_patterns.items():
-            for match in pattern.finditer(text):
-                context = text[max(0, match.start()-20):min(len(text), match.end()+20)]
-                violations.append(PolicyViolation(
-                    type='restricted_keyword',
-                    description=f'Found restricted keyword: {match.group()}',
-                    severity=severity,
-                    context=context
-                ))
-                logger.info(f"Detected {severity} severity keyword: {match.group()}")
+    def _hs_scan(self, text: str, folded: str) -> List[Tuple[int, int, int]]:
+        """
+        Scan the folded text once with the Hyperscan database.
+
+        Hyperscan reports every (possibly overlapping) hit, so hits are reduced
+        to the leftmost-first, non-overlapping set, preferring earlier rules.
+        """
+        if folded.isascii():
+            return self._hs.scan(folded)
+
+        hits = self._hs.matches(folded.encode('utf-8', errors='replace'))
+        candidates = []
+        # Map byte offsets back to characters and re-check the word
+        # boundaries Hyperscan only knows in their ASCII form
+        offsets = _char_offsets(folded)
+        for (start, rule_id), ends in hits.items():
+            start = offsets[start]
+            ends = sorted((offsets[e] for e in ends), reverse=True)
+            for end in ends:
+                if _unicode_bounded(text, start, end):
+                    candidates.append((start, rule_id, end))
+                    break
+            else:
+                m = self._hs.pattern_regex[rule_id].search(text, start + 1)
+                if m and m.start() < ends[0]:
+                    candidates.append((m.start(), rule_id, m.end()))
+        # A non-ASCII letter followed by punctuation is a boundary only
+        # under Unicode rules; probe those positions with the regex
+        for b in _UNICODE_BOUNDARY.finditer(text):
+            m = self.combined.match(text, b.start())
+            if m:
+                candidates.append((m.start(), self._group_rules[m.lastgroup], m.end()))
+        return self._hs.resolve(text, candidates)
+
+    def _match_keywords(self, text: str, folded: str) -> List[Tuple[int, int, int]]:
+        """
+        Find keyword candidates in one Aho-Corasick pass over the lowercased text.
+
+        Returns (start, rule id, end) tuples sorted by start, then priority,
+        keeping only hits on word boundaries of the original text.
+        """
+        candidates = []
+        for last, (rule_id, length) in self._keyword_automaton.iter(folded):
+            start, end = last - length + 1, last + 1
+            if start > 0 and _is_word(text[start-1]) or end < len(text) and _is_word(text[end]):
+                continue
+            candidates.append((start, rule_id, end))
+        candidates.sort()
+        return candidates
+
+    def _to_violations(self, text: str, hits: List[Tuple[int, int, int]], violations: ViolationBatch) -> ViolationBatch:
+        """Append (start, end, rule id) hits to violations, with context."""
+        for start, end, rule_id in hits:
+            vtype, label, severity = self._rules[rule_id]
+            context = text[max(0, start-20):min(len(text), end+20)]
+            if vtype == 'sensitive_info':
+                description = f'Detected {label}'
+                logger.warning(f"Detected sensitive information ({label}) in text")
+            elif vtype == 'restricted_keyword':
+                description = f'Found restricted keyword: {text[start:end]}'
+                logger.info(f"Detected {severity} severity keyword: {text[start:end]}")
+            else:
+                description = 'Detected offensive language or slur'
+                logger.warning("Detected offensive language in text")
+            violations.append(vtype, description, severity, context)
 
         return violations
 
-    def check_content_length(self, text: str) -> List[PolicyViolation]:
+    def _check(self, text: str, vtype: str) -> ViolationBatch:
+        hits = [hit for hit in self._scan(text) if self._rules[hit[2]][0] == vtype]
+        return self._to_violations(text, hits, ViolationBatch())
+
+    def check_sensitive_info(self, text: str) -> ViolationBatch:
+        """Check for sensitive information patterns in text."""
+        return self._check(text, 'sensitive_info')
+
+    def check_restricted_keywords(self, text: str) -> ViolationBatch:
+        """Check for restricted keywords and phrases."""
+        return self._check(text, 'restricted_keyword')
+
+    def check_content_length(self, text: str) -> ViolationBatch:
         """Check if content length is within acceptable limits."""
-        violations = []
+        violations = ViolationBatch()
         
         if len(text) > 10000:  # 10k characters
-            violations.append(PolicyViolation(
-                type='content_length',
-                description='Content exceeds maximum length',
-                severity='medium'
-            ))
+            violations.append('content_length', 'Content exceeds maximum length', 'medium')
             logger.warning("Content length exceeds maximum limit")
         
         return violations
 
-    def check_offensive_language(self, text: str) -> List[PolicyViolation]:
+    def check_offensive_language(self, text: str) -> ViolationBatch:
         """Check for offensive language and slurs in text."""
-        violations = []
-        
-        for match in self.offensive_regex.finditer(text):
-            context = text[max(0, match.start()-20):min(len(text), match.end()+20)]
-            violations.append(PolicyViolation(
-                type='offensive_language',
-                description='Detected offensive language or slur',
-                severity='high',
-                context=context
-            ))
-            logger.warning("Detected offensive language in text")
-
-        return violations
+        return self._check(text, 'offensive_language')
 
-    def enforce_policies(self, text: str) -> tuple[str, List[PolicyViolation]]:
+    def enforce_policies(self, text: str) -> tuple[str, ViolationBatch]:
         """
         Enforce all content policies and return sanitized text with violations.
         """
         if not isinstance(text, str):
             logger.error("Received non-string input for policy enforcement")
-            return "", [PolicyViolation(
-                type='invalid_input',
-                description='Input must be a string',
-                severity='high'
-            )]
-
-        # Collect all violations
-        violations = []
-        violations.extend(self.check_sensitive_info(text))
-        violations.extend(self.check_restricted_keywords(text))
-        violations.extend(self.check_content_length(text))
-        violations.extend(self.check_offensive_language(text))
-
-        # Sanitize text based on violations
-        sanitized_text = text
-        for violation in violations:
-            if violation.type == 'sensitive_info':
-                # Redact sensitive information
-                sanitized_text = self.pattern_regex.sub('[REDACTED]', sanitized_text)
-            elif violation.type == 'restricted_keyword' and violation.severity == 'high':
-                # Redact high-severity keywords
-                sanitized_text = self.keyword_patterns['high_severity'].sub('[REDACTED]', sanitized_text)
-            elif violation.type == 'offensive_language':
-                # Redact offensive language
-                sanitized_text = self.offensive_regex.sub('[REDACTED]', sanitized_text)
+            violations = ViolationBatch()
+            violations.append('invalid_input', 'Input must be a string', 'high')
+            return "", violations
+
+        # Over-length content is rejected outright, before any scanning
+        violations = self.check_content_length(text)
+        if violations:
+            return "", violations
+
+        # Too short for any rule to match
+        if len(text) < self._min_pattern_len:
+            return text, ViolationBatch()
+
+        if len(text) <= _CACHE_KEY_MAX_LEN:
+            key = text
+        else:
+            key = (len(text), hashlib.blake2b(text.encode('utf-8', errors='surrogatepass'), digest_size=16).digest())
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            sanitized_text, violations = cached
+            return sanitized_text, violations.copy()
+
+        sanitized_text, violations = self._apply_policies(text)
+        with self._cache_lock:
+            self._cache[key] = (sanitized_text, violations.copy())
+            if len(self._cache) > _CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return sanitized_text, violations
+
+    def _apply_policies(self, text: str) -> Tuple[str, ViolationBatch]:
+        """Scan text, then build its violations and sanitized version."""
+        # Single pass over the text for every category
+        hits = self._scan(text)
+        by_type = {'sensitive_info': [], 'restricted_keyword': [], 'offensive_language': []}
+        for hit in hits:
+            by_type[self._rules[hit[2]][0]].append(hit)
+
+        violations = ViolationBatch()
+        self._to_violations(text, by_type['sensitive_info'], violations)
+        self._to_violations(text, by_type['restricted_keyword'], violations)
+        self._to_violations(text, by_type['offensive_language'], violations)
+
+        # Sanitize text in the same pass over the hits: redact sensitive info,
+        # high-severity keywords and offensive language
+        pieces = []
+        pos = 0
+        for start, end, rule_id in hits:
+            vtype, _, severity = self._rules[rule_id]
+            if vtype == 'restricted_keyword' and severity != 'high':
+                continue
+            pieces.append(text[pos:start])
+            pieces.append('[REDACTED]')
+            pos = end
+        pieces.append(text[pos:])
+        sanitized_text = ''.join(pieces)
 
         # Log summary of violations
         if violations:
             logger.info(f"Found {len(violations)} policy violations in text")
-            for v in violations:
-                logger.debug(f"Violation: {v.type} - {v.description} ({v.severity})")
+            for vtype, description, severity in zip(violations.types, violations.descriptions, violations.severities):
+                logger.debug(f"Violation: {vtype} - {description} ({severity})")
 
         return sanitized_text, violations
 
+# Non-ASCII letters that re.I matches against [a-z] but lower() leaves alone
+_FOLD_TABLE = {0x131: 'i', 0x17f: 's'}  # dotless i, long s
+
+def _fold(text: str) -> Optional[str]:
+    """
+    Lowercase text so that case-sensitive lowercase patterns match it exactly
+    as the original patterns match text under re.I. Returns None if folding
+    would change the length (e.g. 'İ'), since offsets must carry over.
+    """
+    folded = text.lower()
+    if not folded.isascii():
+        folded = folded.translate(_FOLD_TABLE)
+    return folded if len(folded) == len(text) else None
+
+# Positions that are word boundaries under Unicode but not under ASCII rules
+_UNICODE_BOUNDARY = re.compile(r'(?<=[^\W\x00-\x7f])(?=\W)')
+
+def _char_offsets(text: str) -> List[int]:
+    """Map UTF-8 byte offsets of text to character offsets."""
+    offsets = []
+    for i, ch in enumerate(text):
+        offsets.extend([i] * len(ch.encode('utf-8', errors='replace')))
+    offsets.append(len(text))
+    return offsets
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+def _unicode_bounded(text: str, start: int, end: int) -> bool:
+    """Check that a hit does not touch a non-ASCII word character (Unicode \\b)."""
+    if start > 0 and not text[start-1].isascii() and _is_word(text[start-1]) and _is_word(text[start]):
+        return False
+    if end < len(text) and not text[end].isascii() and _is_word(text[end]) and _is_word(text[end-1]):
+        return False
+    return True
+
 # Create singleton instance
 guardrails = ContentGuardrails()
 
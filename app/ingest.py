@@ -1,32 +1,69 @@
 import io
+import os
 import json
 import re
 import csv
-import pickle
+import hashlib
+import sqlite3
+import string
 import numpy as np
-import pandas as pd
 import faiss
+import openpyxl
+import torch
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 import unicodedata
+from decimal import Decimal
 import html
-from typing import List, Dict, Any, Generator
+from typing import List, Dict, Any, Generator, Iterable, Optional, Tuple
 from .logger import setup_logger
+from .embedder import get_model
+from .regex_engine import PatternSet, compile_pattern, merge_candidates
+from . import numeric_pii
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # python-calamine is optional; Excel files then go through openpyxl
+    CalamineWorkbook = None
+
+try:
+    import hyperscan
+except ImportError:  # Hyperscan is optional; PII redaction then uses re
+    hyperscan = None
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; JSON files are then loaded whole
+    ijson = None
 
 # Set up logger for this module
 logger = setup_logger("bank_llm.ingest", "ingest.log")
 
-# Model & Vector-store paths
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Vector-store paths
 INDEX_PATH = Path("vector_store/faiss.index")
-META_PATH = Path("vector_store/meta.pkl")
+META_PATH = Path("vector_store/meta.db")
+PROCESSED_PATH = Path("vector_store/processed.json")  # Files already in the index
 
 # Chunking configuration
 MAX_CHUNK_SIZE = 1000  # Maximum characters per chunk
 MIN_CHUNK_SIZE = 100   # Minimum characters per chunk
 OVERLAP_SIZE = 50      # Number of characters to overlap between chunks
 
+# File reading configuration
+EXCEL_SUFFIXES = (".xlsx", ".xlsm", ".xlsb", ".xls")  # Read sheet by sheet as tab-separated text
+READ_BLOCK_SIZE = 1 << 20                             # Characters read at a time from text files
+INLINE_EXTRACT_FILES = 4                              # Up to this many files are parsed without a worker pool
+JSON_STREAM_SIZE = 1 << 20                            # JSON files this large (bytes) are parsed incrementally
+JSON_BUFFER_SIZE = 64 << 10                           # Read buffer for streamed JSON files
+
+# Embedding configuration
+ENCODE_BUFFER_SIZE = 4096  # Chunks collected before each model.encode call
+ENCODE_BATCH_SIZE = 64     # Chunks per forward pass inside model.encode
+SQ_TRAIN_SIZE = 10000      # Vectors sampled to train the int8 scalar quantizer
+HNSW_M = 32                # Graph neighbours per vector in the HNSW index
+HNSW_EF_CONSTRUCTION = 200 # Candidate list size while building the graph
+
 # Enhanced PII detection patterns
 PII_PATTERNS = {
     'credit_card': r'(?:\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b)',
@@ -39,7 +76,43 @@ PII_PATTERNS = {
 }
 
 # Compile all patterns
-PII_REGEX = re.compile('|'.join(f'(?P<{k}>{v})' for k, v in PII_PATTERNS.items()), flags=re.I)
+PII_REGEX = compile_pattern('|'.join(f'(?P<{k}>{v})' for k, v in PII_PATTERNS.items()), flags=re.I)
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+_HAS_ALPHA_RE = re.compile(r'[a-zA-Z]')
+_DROP_ASCII_LETTERS = str.maketrans('', '', string.ascii_letters)
+
+class _CleanTable(dict):
+    """
+    str.translate table that lowercases each character and turns anything
+    outside [\\w\\s.,!?-] into a space. Entries are filled in on first use.
+    """
+
+    def __missing__(self, code: int) -> str:
+        cleaned = ''.join(
+            c if c.isalnum() or c.isspace() or c in '_.,!?-' else ' '
+            for c in chr(code).lower()
+        )
+        self[code] = cleaned
+        return cleaned
+
+_CLEAN_TABLE = _CleanTable()
+
+# Replacement text for each PII type, looked up by group name
+_REDACTIONS = {k: f"[REDACTED_{k.upper()}]" for k in PII_PATTERNS}
+
+# Digit-only PII goes to the compiled numeric scanner when numba is
+# available; this regex then holds the remaining patterns (see numeric_pii)
+_PII_IDS = {k: i for i, k in enumerate(PII_PATTERNS)}
+_NUMERIC_KINDS = numeric_pii.numeric_kinds(PII_PATTERNS.items()) if numeric_pii.ENABLED else []
+_NUMERIC_IDS = [_PII_IDS[k] for k in _NUMERIC_KINDS]
+_PII_RESIDUAL_REGEX = compile_pattern('|'.join(
+    f'(?P<{k}>{numeric_pii.PREFIXED_PHONE if k == "phone" else v})'
+    for k, v in PII_PATTERNS.items() if k not in _NUMERIC_KINDS or k == 'phone'
+), flags=re.I)
+
+# All PII patterns in one Hyperscan database, when Hyperscan is installed
+_PII_TYPES = list(PII_PATTERNS)
+_PII_HS = PatternSet(list(PII_PATTERNS.values()), re.I) if hyperscan is not None else None
 
 def normalize_text(text: str) -> str:
     """Normalize text by handling unicode, HTML entities, and whitespace."""
@@ -47,37 +120,62 @@ def normalize_text(text: str) -> str:
     text = html.unescape(text)
     # Normalize unicode characters
     text = unicodedata.normalize('NFKC', text)
-    # Replace multiple spaces with single space
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    # Replace runs of whitespace with a single space and trim the ends
+    return ' '.join(text.split())
 
 def detect_and_redact_pii(text: str) -> str:
     """Detect and redact PII from text."""
-    def replace_match(match):
-        pii_type = match.lastgroup
-        return f"[REDACTED_{pii_type.upper()}]"
-    
-    return PII_REGEX.sub(replace_match, text)
+    # Hyperscan and the numeric scanner only handle ASCII; other text uses re
+    if _PII_HS is not None and text.isascii() and _PII_HS.handles(text):
+        return _redact(text, _PII_HS.scan(text))
+    if _NUMERIC_KINDS and text.isascii():
+        candidates = [
+            (start, _NUMERIC_IDS[kind], end)
+            for start, kind, end in numeric_pii.find_numeric_pii(text, _NUMERIC_KINDS)
+        ]
+        return _redact(text, merge_candidates(text, candidates, _PII_RESIDUAL_REGEX, _PII_IDS))
+    return PII_REGEX.sub(lambda m: _REDACTIONS[m.lastgroup], text)
+
+def _redact(text: str, hits: List[Tuple[int, int, int]]) -> str:
+    """Replace (start, end, PII type index) hits, ordered by start, with their markers."""
+    pieces = []
+    pos = 0
+    for start, end, pii_id in hits:
+        pieces.append(text[pos:start])
+        pieces.append(_REDACTIONS[_PII_TYPES[pii_id]])
+        pos = end
+    pieces.append(text[pos:])
+    return ''.join(pieces)
 
 def clean_text(text: str) -> str:
     """Apply comprehensive text cleaning."""
     if not isinstance(text, str):
         return ""
     
-    # Basic cleaning
-    text = normalize_text(text)
-    text = text.lower()
-    
-    # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s.,!?-]', ' ', text)
-    
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    # Decode HTML entities and normalize unicode characters
+    text = unicodedata.normalize('NFKC', html.unescape(text))
+    # Lowercasing a capital sigma depends on its neighbours, which a
+    # per-character table cannot see
+    if '\u03a3' in text:
+        text = text.lower()
+
+    # One pass lowercases and replaces special characters (keeping basic
+    # punctuation), one more collapses and trims whitespace
+    text = ' '.join(text.translate(_CLEAN_TABLE).split())
     
     # Redact PII
-    text = detect_and_redact_pii(text)
-    
-    return text.strip()
+    return detect_and_redact_pii(text)
+
+def _has_ascii_letter(text: str) -> bool:
+    # Text usually has a letter near the start, which the regex finds at once.
+    # Otherwise, for ASCII text, deleting all letters in one str.translate
+    # pass is about 3x faster than the regex scanning to the end; on other
+    # text translate is slower, so the regex finishes the search.
+    if _HAS_ALPHA_RE.search(text, 0, 64):
+        return True
+    if text.isascii():
+        return text.translate(_DROP_ASCII_LETTERS) != text
+    return _HAS_ALPHA_RE.search(text, 64) is not None
 
 def validate_chunk(chunk: str) -> bool:
     """Validate if a text chunk is worth processing."""
@@ -89,7 +187,7 @@ def validate_chunk(chunk: str) -> bool:
         return False
     
     # Check if it's not just whitespace or special characters
-    if not re.search(r'[a-zA-Z]', chunk):
+    if not _has_ascii_letter(chunk):
         return False
     
     return True
@@ -118,6 +216,31 @@ def flatten_json(obj, parent_key=""):
     else:
         yield f"{parent_key}: {obj}"
 
+def stream_json(f):
+    """Like flatten_json(json.load(f)), but parses the binary file f incrementally."""
+    parents = []
+    key = ""
+    for _, event, value in ijson.parse(f):
+        if event == "map_key":
+            key = f"{parents[-1]}.{value}" if parents[-1] else value
+        elif event == "start_map":
+            parents.append(key)
+        elif event == "end_map":
+            key = parents.pop()
+        elif event not in ("start_array", "end_array"):
+            # ijson reads non-integer numbers as Decimal; print them like json.load's floats
+            yield f"{key}: {float(value) if isinstance(value, Decimal) else value}"
+
+def read_json_leaves(path: Path) -> Generator[str, None, None]:
+    """Yield "key.path: value" for every leaf of a JSON file."""
+    if ijson is not None and path.stat().st_size >= JSON_STREAM_SIZE:
+        with open(path, "rb", buffering=JSON_BUFFER_SIZE) as f:
+            yield from stream_json(f)
+    else:
+        with open_utf8(path) as f:
+            data = json.load(f)
+        yield from flatten_json(data)
+
 def split_into_chunks(text: str) -> Generator[str, None, None]:
     """
     Split text into overlapping chunks based on semantic boundaries and size limits.
@@ -129,15 +252,30 @@ def split_into_chunks(text: str) -> Generator[str, None, None]:
         Chunks of text that are semantically meaningful and within size limits
     """
     # First split by paragraphs
-    paragraphs = text.split('\n\n')
-    
+    yield from chunk_paragraphs(iter_paragraphs(text))
+
+def iter_paragraphs(text: str) -> Generator[str, None, None]:
+    """
+    Yield the pieces of text.split('\n\n') one at a time, locating each
+    break with str.find instead of building the whole list up front.
+    """
+    start = 0
+    end = text.find('\n\n')
+    while end >= 0:
+        yield text[start:end]
+        start = end + 2
+        end = text.find('\n\n', start)
+    yield text[start:]
+
+def chunk_paragraphs(paragraphs: Iterable[str]) -> Generator[str, None, None]:
+    """Group paragraphs into overlapping chunks, as split_into_chunks does."""
     current_chunk = []
     current_size = 0
     
     for paragraph in paragraphs:
         # If paragraph is too long, split it into sentences
         if len(paragraph) > MAX_CHUNK_SIZE:
-            sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+            sentences = _SENT_RE.split(paragraph)
             
             for sentence in sentences:
                 sentence = sentence.strip()
@@ -178,12 +316,52 @@ def split_into_chunks(text: str) -> Generator[str, None, None]:
         if len(chunk) >= MIN_CHUNK_SIZE:
             yield chunk
 
+def read_paragraphs(path: Path) -> Generator[str, None, None]:
+    """
+    Stream a text file as the paragraphs that splitting its whole text on
+    blank lines would give, without holding the file in memory.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        pending = []  # Blocks read since the last paragraph break
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), ""):
+            # A break may also straddle the boundary between two blocks
+            if "\n\n" not in block and not (pending and pending[-1].endswith("\n") and block.startswith("\n")):
+                pending.append(block)
+                continue
+            paragraphs = ("".join(pending) + block).split("\n\n")
+            pending = [paragraphs.pop()]
+            yield from paragraphs
+        yield "".join(pending)
+
+def _cell_text(value) -> str:
+    # Calamine reads every number as float; print whole numbers as integers
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def read_excel_sheets(path: Path) -> Generator[str, None, None]:
+    """Yield each sheet of a workbook as tab-separated text, one row per line."""
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(str(path))
+        for sheet_name in workbook.sheet_names:
+            rows = workbook.get_sheet_by_name(sheet_name).to_python()
+            yield "\n".join("\t".join(_cell_text(v) for v in row) for row in rows)
+    else:
+        # Read-only mode streams rows from the file instead of loading every cell
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                yield "\n".join("\t".join(_cell_text(v) for v in row) for row in rows)
+        finally:
+            workbook.close()
+
 def _read_generic(path: Path):
     suffix = path.suffix.lower()
     if suffix == ".json":
-        with open_utf8(path) as f:
-            data = json.load(f)
-        for chunk in flatten_json(data):
+        for chunk in read_json_leaves(path):
             processed = process_chunk(chunk)
             if processed:
                 yield processed
@@ -194,16 +372,190 @@ def _read_generic(path: Path):
                 processed = process_chunk(row.get("text", ""))
                 if processed:
                     yield processed
+    elif suffix in EXCEL_SUFFIXES:
+        for sheet_text in read_excel_sheets(path):
+            for chunk in split_into_chunks(sheet_text):
+                processed = process_chunk(chunk)
+                if processed:
+                    yield processed
     else:
-        # for .txt and other files
-        text = path.read_text(encoding="utf-8", errors="replace")
-        # Split text into chunks and process each chunk
-        for chunk in split_into_chunks(text):
+        # for .txt and other files, streamed paragraph by paragraph
+        for chunk in chunk_paragraphs(read_paragraphs(path)):
             processed = process_chunk(chunk)
             if processed:
                 yield processed
 
-def build_or_update_index(dataset_dir: str):
+def extract_and_clean(path: Path) -> List[str]:
+    """Read a file and return its cleaned, PII-redacted chunks."""
+    return list(_read_generic(path))
+
+def _extract_file(path: Path) -> Optional[List[str]]:
+    """Worker entry point: like extract_and_clean, but logs errors and returns None."""
+    try:
+        return extract_and_clean(path)
+    except Exception as e:
+        logger.error(f"Error processing {path}: {e}")
+        return None
+
+def _embed_batch(model, vectors: np.ndarray, meta: List[str], batch: List[str]) -> np.ndarray:
+    """
+    Encode a buffer of chunks in one model.encode call and append the
+    embeddings to the preallocated matrix, growing it by doubling. Returns
+    the matrix.
+    """
+    if not batch:
+        return vectors
+    # Encode in order of length so each forward pass pads to a similar size
+    order = np.argsort([len(c) for c in batch], kind="stable")
+    with torch.inference_mode():
+        embs = model.encode(
+            [batch[i] for i in order],
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_tensor=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+    # Half-precision output is widened back to float32 for FAISS
+    embs = embs.float().cpu().numpy()
+    offset = len(meta)
+    if offset + len(embs) > len(vectors):
+        grown = np.empty((max(2 * len(vectors), offset + len(embs)), vectors.shape[1]), dtype=np.float32)
+        grown[:offset] = vectors[:offset]
+        vectors = grown
+    # Scatter each embedding straight into its chunk's row, restoring chunk
+    # order without an intermediate reordered copy
+    vectors[offset + order] = embs
+    meta.extend(batch)
+    batch.clear()
+    return vectors
+
+def chunk_hash(chunk: str) -> int:
+    """Stable 64-bit content hash of a chunk, as a signed int so SQLite can store it."""
+    digest = hashlib.blake2b(chunk.encode("utf-8", errors="surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def write_meta(meta: List[str], path: Path = META_PATH):
+    """
+    Write chunk texts to a SQLite table, row id i matching vector i, so the
+    retriever looks up only the chunks a search returns.
+    """
+    # Write next to the target and rename: a retriever may have the old file open
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    with sqlite3.connect(tmp_path) as db:
+        db.execute("CREATE TABLE meta (id INTEGER PRIMARY KEY, text TEXT, hash INTEGER)")
+        db.executemany("INSERT INTO meta (id, text, hash) VALUES (?, ?, ?)",
+                       ((i, text, chunk_hash(text)) for i, text in enumerate(meta)))
+    db.close()
+    os.replace(tmp_path, path)
+
+def append_meta(meta: List[str], start_id: int, path: Path = META_PATH):
+    """Add chunk texts for the vectors numbered from start_id on."""
+    with sqlite3.connect(path) as db:
+        db.executemany("INSERT INTO meta (id, text, hash) VALUES (?, ?, ?)",
+                       ((i, text, chunk_hash(text)) for i, text in enumerate(meta, start_id)))
+    db.close()
+
+def truncate_meta(start_id: int, path: Path = META_PATH):
+    """Delete the chunk texts numbered from start_id on."""
+    with sqlite3.connect(path) as db:
+        db.execute("DELETE FROM meta WHERE id >= ?", (start_id,))
+    db.close()
+
+def write_index(index, path: Path = INDEX_PATH):
+    """Write the FAISS index next to the target and rename it into place."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    faiss.write_index(index, str(tmp_path))
+    os.replace(tmp_path, path)
+
+def read_meta_hashes(path: Path = META_PATH) -> set:
+    """Content hashes of the chunks already in the store."""
+    with sqlite3.connect(path) as db:
+        hashes = {h for (h,) in db.execute("SELECT hash FROM meta")}
+    db.close()
+    return hashes
+
+def _read_processed() -> set:
+    if not PROCESSED_PATH.exists():
+        return set()
+    with open(PROCESSED_PATH, encoding="utf-8") as f:
+        return set(json.load(f))
+
+def _write_processed(processed: set):
+    with open(PROCESSED_PATH, "w", encoding="utf-8") as f:
+        json.dump(sorted(processed), f, indent=2)
+
+def _embed_files(files: List[Path], stats: Dict[str, int], seen: set) -> Tuple[np.ndarray, List[str], int, List[Path]]:
+    """
+    Read, clean and embed files, skipping chunks whose content hash is in
+    seen and adding the others' hashes to it. Returns the vectors, their
+    chunk texts, the embedding dimension and the files that were read
+    without errors.
+    """
+    if len(files) <= INLINE_EXTRACT_FILES:
+        # For a few files (e.g. one upload) a pool costs more than it saves,
+        # and would fork the whole calling process, such as the API with its
+        # threads and loaded model
+        return _embed_results(((path, _extract_file(path)) for path in files), len(files), stats, seen)
+
+    # Reading, cleaning and PII redaction are CPU-bound and independent per
+    # file, so they run in worker processes; encoding stays in this process.
+    # Work is submitted before the model is loaded so workers fork without it
+    # (unless this process already holds it).
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(files))) as executor:
+        futures = {executor.submit(_extract_file, path): path for path in files}
+        # Take each file's chunks as soon as it is done, so one large file
+        # does not hold back the ones behind it; chunks are stored in
+        # completion order, each next to its own vector
+        results = ((futures[future], future.result()) for future in as_completed(futures))
+        return _embed_results(results, len(files), stats, seen)
+
+def _embed_results(results: Iterable[Tuple[Path, Optional[List[str]]]], total: int, stats: Dict[str, int],
+                   seen: set) -> Tuple[np.ndarray, List[str], int, List[Path]]:
+    """Embed the (path, chunks) results of _extract_file, as _embed_files describes."""
+    meta = []
+    batch = []
+    done = []
+
+    model = get_model()
+    dim = model.get_sentence_embedding_dimension()
+    # All embeddings go into one float32 matrix that is added to the index once
+    vectors = np.empty((ENCODE_BUFFER_SIZE, dim), dtype=np.float32)
+
+    progress = tqdm(results, total=total, desc="Building index", unit="file")
+    for path, chunks in progress:
+        if chunks is None:
+            continue
+        done.append(path)
+        stats["total_chunks"] += len(chunks)
+        stats["valid_chunks"] += len([c for c in chunks if c])
+        stats["processed_files"] += 1
+
+        # Identical chunks (repeated boilerplate, re-uploaded documents)
+        # would only add duplicate neighbours to every search
+        for chunk in chunks:
+            if not chunk:
+                continue
+            h = chunk_hash(chunk)
+            if h in seen:
+                stats["duplicate_chunks"] += 1
+                continue
+            seen.add(h)
+            batch.append(chunk)
+            if len(batch) >= ENCODE_BUFFER_SIZE:
+                vectors = _embed_batch(model, vectors, meta, batch)
+        progress.set_postfix(chunks=len(meta) + len(batch), refresh=False)
+
+    # Flush the final partial batch
+    vectors = _embed_batch(model, vectors, meta, batch)
+    return vectors[:len(meta)], meta, dim, done
+
+def build_or_update_index(dataset_dir: str, files: Optional[List[Path]] = None):
+    """
+    Build the index from every file under dataset_dir or, given files, add
+    just those to the existing index. Files already indexed are skipped, so
+    adding the same file twice does not duplicate its chunks.
+    """
     dataset_dir = Path(dataset_dir)
     
     # Track processing statistics
@@ -212,48 +564,55 @@ def build_or_update_index(dataset_dir: str):
         "processed_files": 0,
         "total_chunks": 0,
         "valid_chunks": 0,
+        "duplicate_chunks": 0,
         "redacted_pii": 0
     }
 
-    # Convert all Excel files to txt per sheet
-    for excel_path in dataset_dir.glob("**/*.xls*"):
-        try:
-            sheets = pd.read_excel(excel_path, sheet_name=None, engine="openpyxl")
-            for sheet_name, df in sheets.items():
-                txt_path = excel_path.parent / f"{excel_path.stem}_{sheet_name}.txt"
-                df.to_csv(txt_path, index=False, sep="\t")
-        except Exception as e:
-            logger.warning(f"Failed to convert {excel_path}: {e}")
-
-    model = SentenceTransformer(MODEL_NAME)
-    dim = model.get_sentence_embedding_dimension()
-    index = faiss.IndexFlatIP(dim)
-    meta = []
+    if files is not None and INDEX_PATH.exists() and META_PATH.exists():
+        processed = _read_processed()
+        files = [p for p in files if str(p.resolve()) not in processed]
+        stats["total_files"] = len(files)
+        if not files:
+            logger.info("All given files are already indexed")
+            return
+        # The quantizer stays trained on the corpus the index was built from
+        index = faiss.read_index(str(INDEX_PATH))
+        # An update whose index write failed left meta rows past the last
+        # vector; drop them so new ids start at index.ntotal and their
+        # hashes do not mark the chunks as already stored
+        truncate_meta(index.ntotal)
+        new_vectors, new_meta, _, done = _embed_files(files, stats, read_meta_hashes())
+        if len(new_vectors):
+            if not index.is_trained:  # built from files that had no chunks
+                index.train(new_vectors[:SQ_TRAIN_SIZE])
+            append_meta(new_meta, index.ntotal)
+            index.add(new_vectors)
+            write_index(index)
+        _write_processed(processed | {str(p.resolve()) for p in done})
+        logger.info(f"Added {len(new_meta)} chunks ({stats['duplicate_chunks']} duplicates skipped); "
+                    f"vector store now has {index.ntotal} chunks")
+        return
 
-    # Ingest all non-Excel files (including generated txt)
-    files = [p for p in dataset_dir.glob("**/*") if p.is_file() and p.suffix.lower() not in (".xlsx", ".xls")]
+    # Ingest all files; Excel workbooks are read in place, sheet by sheet
+    if files is None:
+        files = [p for p in dataset_dir.glob("**/*") if p.is_file()]
     stats["total_files"] = len(files)
-    
-    with tqdm(files, desc="Building index", unit="file") as pbar:
-        for file in pbar:
-            try:
-                chunks = list(_read_generic(file))
-                stats["total_chunks"] += len(chunks)
-                stats["valid_chunks"] += len([c for c in chunks if c])
-                stats["processed_files"] += 1
-                
-                for chunk in chunks:
-                    if chunk:
-                        emb = model.encode(chunk, convert_to_numpy=True)
-                        index.add(emb.reshape(1, -1))
-                        meta.append(chunk)
-            except Exception as e:
-                logger.error(f"Error processing {file}: {e}")
+    vectors, meta, dim, done = _embed_files(files, stats, set())
+
+    # Search an HNSW graph (sub-linear query time) over vectors stored as int8
+    # (4x smaller than float32). The quantizer learns per-dimension ranges
+    # from an evenly spread sample of the corpus.
+    index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    if len(vectors):
+        step = max(1, len(vectors) // SQ_TRAIN_SIZE)
+        index.train(np.ascontiguousarray(vectors[::step][:SQ_TRAIN_SIZE]))
+        index.add(vectors)
 
     INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, str(INDEX_PATH))
-    with open(META_PATH, "wb") as f:
-        pickle.dump(meta, f)
+    write_index(index)
+    write_meta(meta)
+    _write_processed({str(p.resolve()) for p in done})
     
     logger.info(f"Vector store built with {len(meta)} chunks")
     logger.info("Processing stats:")
@@ -261,6 +620,7 @@ def build_or_update_index(dataset_dir: str):
     logger.info(f"   - Processed files: {stats['processed_files']}")
     logger.info(f"   - Total chunks: {stats['total_chunks']}")
     logger.info(f"   - Valid chunks: {stats['valid_chunks']}")
+    logger.info(f"   - Duplicate chunks skipped: {stats['duplicate_chunks']}")
 
 if __name__ == "__main__":
     import sys
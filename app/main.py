@@ -1,6 +1,11 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import shutil, uuid, asyncio, os
+import orjson
+from pathlib import Path
+from typing import List
 
 from app.retrieval import Retriever
 from app.model import BankAssistant
@@ -30,22 +35,48 @@ logger = setup_logger("bank_llm.api", "api.log")
 UPLOADS_DIR = "data/uploads"
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
+# Incremental index updates read and rewrite faiss.index, meta.db and
+# processed.json, so only one may run at a time
+index_lock = asyncio.Lock()
+
 class Query(BaseModel):
     question: str
 
+# Typed responses are serialized to JSON by pydantic directly
+class Answer(BaseModel):
+    answer: str
+    context: List[str]
+
+class UploadResult(BaseModel):
+    status: str
+    message: str
+
 def refresh_retriever():
     """Refresh the retriever with the latest documents"""
     global retriever
     retriever = Retriever()
 
 @app.post("/query")
-async def ask_llm(q: Query):
-    docs = retriever.search(q.question)
-    answer = assistant.chat(q.question, docs)
-    return {"answer": answer, "context": docs}
+async def ask_llm(q: Query) -> Answer:
+    # Embedding and search are CPU-bound; run them off the event loop
+    docs = await run_in_threadpool(retriever.search, q.question)
+    answer = "".join([token async for token in assistant.chat_async(q.question, docs)])
+    return Answer(answer=answer, context=docs)
+
+@app.post("/query/stream")
+async def ask_llm_stream(q: Query):
+    docs = await run_in_threadpool(retriever.search, q.question)
+
+    async def events():
+        # One server-sent event per piece of the answer, JSON-encoded so
+        # newlines in the text do not end the event
+        async for token in assistant.chat_async(q.question, docs):
+            yield b"data: " + orjson.dumps(token) + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 @app.post("/add-document")
-async def add_document(doc: UploadFile = File(...)):
+async def add_document(doc: UploadFile = File(...)) -> UploadResult:
     if not doc.filename:
         raise HTTPException(status_code=400, detail="No file provided")
         
@@ -56,18 +87,20 @@ async def add_document(doc: UploadFile = File(...)):
             shutil.copyfileobj(doc.file, buffer)
         logger.info(f"Successfully uploaded file: {doc.filename}")
         
-        # Process the document synchronously
-        build_or_update_index(UPLOADS_DIR)
-        logger.info(f"Processed document: {doc.filename}")
-        
-        # Refresh the retriever to include the new document
-        refresh_retriever()
-        logger.info("Retriever refreshed with new document")
+        # Add just this document to the existing index, off the event loop
+        # so queries keep streaming meanwhile
+        async with index_lock:
+            await run_in_threadpool(build_or_update_index, UPLOADS_DIR, [Path(temp_path)])
+            logger.info(f"Processed document: {doc.filename}")
+
+            # Refresh the retriever to include the new document
+            await run_in_threadpool(refresh_retriever)
+            logger.info("Retriever refreshed with new document")
         
-        return {
-            "status": "success", 
-            "message": f"File {doc.filename} uploaded and processed successfully"
-        }
+        return UploadResult(
+            status="success",
+            message=f"File {doc.filename} uploaded and processed successfully"
+        )
     except Exception as e:
         logger.error(f"Failed to upload file {doc.filename}: {str(e)}")
         if os.path.exists(temp_path):
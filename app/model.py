@@ -1,4 +1,5 @@
-from app.ollama_client import generate
+from typing import AsyncIterator
+from app.ollama_client import generate, generate_async
 
 class BankAssistant:
     _system = (
@@ -6,11 +7,20 @@ class BankAssistant:
         "Use the context below. If you do not know the answer, apologise briefly."
     )
 
-    def chat(self, question: str, context_docs: list[str]) -> str:
+    def _prompt(self, question: str, context_docs: list[str]) -> str:
         context = "\n\n".join(context_docs[:4])
-        prompt = (
+        return (
             f"<|system|>\n{self._system}\n"
             f"<|context|>\n{context}\n"
             f"<|user|>\n{question}\n<|assistant|>"
         )
+
+    def chat(self, question: str, context_docs: list[str]) -> str:
+        prompt = self._prompt(question, context_docs)
         return generate(prompt, stream=False, temperature=0.2, top_p=0.95)
+
+    async def chat_async(self, question: str, context_docs: list[str]) -> AsyncIterator[str]:
+        """Like chat, but yields the answer piece by piece as Ollama generates it."""
+        prompt = self._prompt(question, context_docs)
+        async for token in generate_async(prompt, temperature=0.2, top_p=0.95):
+            yield token
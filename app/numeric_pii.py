@@ -0,0 +1,162 @@
+import numpy as np
+from typing import List, Sequence, Tuple
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; callers then keep these patterns in their regex
+    njit = None
+
+# True when the compiled scanner can be used
+ENABLED = njit is not None
+
+# The regexes the scanner reproduces. A caller only hands a pattern to the
+# scanner if its own regex is exactly this one.
+PATTERNS = {
+    'credit_card': r'(?:\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b)',
+    'ssn': r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b',
+    'phone': r'\b(?:\+\d{1,3}[-\s]?)?\(?\d{3}\)?[-\s]?\d{3}[-\s]?\d{4}\b',
+    'account_number': r'\b\d{10,17}\b',
+    'routing_number': r'\b\d{9}\b',
+    'date': r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
+}
+_KIND_IDS = {name: i for i, name in enumerate(PATTERNS)}
+_CREDIT_CARD, _SSN, _PHONE, _ACCOUNT, _ROUTING, _DATE = range(len(PATTERNS))
+
+# The scanner only handles matches that start with a digit; phone numbers
+# starting with '+' or '(' stay in the regex, using this pattern
+PREFIXED_PHONE = r'\b(?:\+\d{1,3}[-\s]?\(?|\()\d{3}\)?[-\s]?\d{3}[-\s]?\d{4}\b'
+
+def _is_digit(c):
+    return 48 <= c <= 57
+
+def _is_word(c):
+    return 48 <= c <= 57 or 65 <= c <= 90 or 97 <= c <= 122 or c == 95
+
+def _is_sep(c):
+    # '-' or a character Python's re counts as \s
+    return c == 45 or c == 32 or 9 <= c <= 13 or 28 <= c <= 31
+
+def _digits(buf, i, count):
+    if i + count > len(buf):
+        return False
+    for j in range(i, i + count):
+        if not _is_digit(buf[j]):
+            return False
+    return True
+
+def _bounded(buf, i):
+    # Word boundary after a digit at i - 1
+    return i == len(buf) or not _is_word(buf[i])
+
+def _skip_sep(buf, i):
+    return i + 1 if i < len(buf) and _is_sep(buf[i]) else i
+
+def _match_groups(buf, i, g1, g2, g3, g4):
+    """Match digit groups of the given sizes, each optionally followed by a separator."""
+    if not _digits(buf, i, g1):
+        return -1
+    i = _skip_sep(buf, i + g1)
+    if not _digits(buf, i, g2):
+        return -1
+    i = _skip_sep(buf, i + g2)
+    if not _digits(buf, i, g3):
+        return -1
+    i += g3
+    if g4:
+        i = _skip_sep(buf, i)
+        if not _digits(buf, i, g4):
+            return -1
+        i += g4
+    return i if _bounded(buf, i) else -1
+
+def _match_kind(buf, p, kind):
+    """Return the end of the match of one pattern at p, or -1. buf[p] is a digit."""
+    n = len(buf)
+    if kind == _CREDIT_CARD:
+        return _match_groups(buf, p, 4, 4, 4, 4)
+    if kind == _SSN:
+        return _match_groups(buf, p, 3, 2, 4, 0)
+    if kind == _PHONE:
+        if not _digits(buf, p, 3):
+            return -1
+        i = p + 3
+        if i < n and buf[i] == 41:  # ')'
+            i += 1
+        return _match_phone_tail(buf, _skip_sep(buf, i))
+    if kind == _ACCOUNT or kind == _ROUTING:
+        end = p
+        while end < n and _is_digit(buf[end]):
+            end += 1
+        length = end - p
+        if kind == _ACCOUNT and 10 <= length <= 17 or kind == _ROUTING and length == 9:
+            return end if _bounded(buf, end) else -1
+        return -1
+    if kind == _DATE:
+        # \d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b, trying longer digit runs first
+        for a in (2, 1):
+            i = p + a
+            if not _digits(buf, p, a) or i >= n or buf[i] != 47 and buf[i] != 45:
+                continue
+            for b in (2, 1):
+                j = i + 1 + b
+                if not _digits(buf, i + 1, b) or j >= n or buf[j] != 47 and buf[j] != 45:
+                    continue
+                for c in (4, 3, 2):
+                    if _digits(buf, j + 1, c) and _bounded(buf, j + 1 + c):
+                        return j + 1 + c
+        return -1
+    return -1
+
+def _match_phone_tail(buf, i):
+    # \d{3}[-\s]?\d{4}\b
+    if not _digits(buf, i, 3):
+        return -1
+    i = _skip_sep(buf, i + 3)
+    if not _digits(buf, i, 4):
+        return -1
+    i += 4
+    return i if _bounded(buf, i) else -1
+
+def _scan(buf, kinds):
+    """
+    Find, for every position where a digit starts a word, the first of kinds
+    that matches there. Returns (start, index into kinds, end) tuples.
+    """
+    hits = [(0, 0, 0)] * 0
+    for p in range(len(buf)):
+        if not _is_digit(buf[p]) or p > 0 and _is_word(buf[p-1]):
+            continue
+        for k in range(len(kinds)):
+            end = _match_kind(buf, p, kinds[k])
+            if end >= 0:
+                hits.append((p, k, end))
+                break
+    return hits
+
+if ENABLED:
+    _is_digit = njit(cache=True)(_is_digit)
+    _is_word = njit(cache=True)(_is_word)
+    _is_sep = njit(cache=True)(_is_sep)
+    _digits = njit(cache=True)(_digits)
+    _bounded = njit(cache=True)(_bounded)
+    _skip_sep = njit(cache=True)(_skip_sep)
+    _match_groups = njit(cache=True)(_match_groups)
+    _match_phone_tail = njit(cache=True)(_match_phone_tail)
+    _match_kind = njit(cache=True)(_match_kind)
+    _scan = njit(cache=True, nogil=True)(_scan)
+
+def numeric_kinds(patterns: Sequence[Tuple[str, str]]) -> List[str]:
+    """Names of the (name, regex) patterns the scanner can take over."""
+    return [name for name, pattern in patterns if PATTERNS.get(name) == pattern]
+
+def find_numeric_pii(text: str, kinds: Sequence[str]) -> List[Tuple[int, int, int]]:
+    """
+    Scan ASCII text for digit-only PII in one compiled pass.
+
+    kinds names the patterns to look for, in priority order. Returns
+    (start, index into kinds, end) for every position where one of them
+    matches, with the first matching kind, sorted by start. Each match is
+    the one the corresponding regex in PATTERNS would find at that start.
+    """
+    buf = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    return _scan(buf, np.array([_KIND_IDS[k] for k in kinds], dtype=np.int64))
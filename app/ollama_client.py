@@ -1,5 +1,9 @@
+import httpx
+import orjson
 import requests
 import os
+from requests.adapters import HTTPAdapter
+from typing import AsyncIterator
 from .logger import setup_logger
 
 # Set up logger for this module
@@ -8,6 +12,16 @@ logger = setup_logger("bank_llm.ollama", "ollama.log")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 MODEL_NAME  = os.getenv("OLLAMA_MODEL", "llama3.2")  # pulled with `ollama run llama3.2`
 
+# One session for all calls, so connections to Ollama are kept alive and
+# reused instead of opened per request
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Async counterpart used by the API, so waiting on Ollama does not block the event loop
+_ASYNC = httpx.AsyncClient(base_url=OLLAMA_HOST, timeout=180)
+
 def generate(prompt: str, stream: bool = False, **gen_kwargs) -> str:
     """
     Call the local Ollama server and return the full response text.
@@ -18,11 +32,33 @@ def generate(prompt: str, stream: bool = False, **gen_kwargs) -> str:
         "stream": stream,
         **gen_kwargs,          # e.g. temperature, top_p…
     }
-    r = requests.post(f"{OLLAMA_HOST}/api/generate", json=body, timeout=180)
+    r = _SESSION.post(f"{OLLAMA_HOST}/api/generate", json=body, timeout=180)
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
     return data["response"]
 
+async def generate_async(prompt: str, **gen_kwargs) -> AsyncIterator[str]:
+    """
+    Call the local Ollama server and yield the response text as it is generated.
+    """
+    body = {
+        "model": f"{MODEL_NAME}:latest",
+        "prompt": prompt,
+        "stream": True,
+        **gen_kwargs,
+    }
+    async with _ASYNC.stream("POST", "/api/generate", json=body) as r:
+        r.raise_for_status()
+        # Ollama streams one JSON object per line
+        async for line in r.aiter_lines():
+            if not line:
+                continue
+            data = orjson.loads(line)
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                break
+
 class OllamaClient:
     def __init__(self, base_url="http://localhost:11434"):
         self.base_url = base_url
@@ -30,12 +66,12 @@ class OllamaClient:
 
     def generate(self, prompt: str, model: str = "llama2") -> str:
         try:
-            response = requests.post(
+            response = _SESSION.post(
                 f"{self.base_url}/api/generate",
                 json={"model": model, "prompt": prompt}
             )
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             logger.debug(f"Generated response for prompt: {prompt[:100]}...")
             return result["response"]
         except Exception as e:
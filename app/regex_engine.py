@@ -0,0 +1,210 @@
+import heapq
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from .logger import setup_logger
+
+try:
+    import re2
+except ImportError:  # google-re2 is optional; fall back to Python's re
+    re2 = None
+
+try:
+    import hyperscan
+except ImportError:  # Hyperscan is optional; PatternSet is then unavailable
+    hyperscan = None
+
+# Set up logger for this module
+logger = setup_logger("bank_llm.regex", "regex.log")
+
+# The characters Python's \s matches in ASCII text; RE2's \s leaves out
+# \v and \x1c-\x1f, so patterns spell the class out for RE2
+_ASCII_SPACE = r'\t\n\x0b\x0c\r\x1c-\x1f '
+
+def _re2_pattern(pattern: str) -> Optional[str]:
+    """Rewrite \\s in pattern as an explicit class for RE2; None if it has \\S."""
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            escape = pattern[i:i+2]
+            if escape == '\\S':
+                return None
+            if escape == '\\s':
+                out.append(_ASCII_SPACE if in_class else f'[{_ASCII_SPACE}]')
+            else:
+                out.append(escape)
+            i += 2
+            continue
+        if in_class:
+            in_class = c != ']'
+        elif c == '[':
+            # A ']' right after '[' or '[^' is a literal member
+            end = i + 1 + (pattern[i+1:i+2] == '^')
+            if pattern[end:end+1] == ']':
+                end += 1
+            out.append(pattern[i:end])
+            in_class = True
+            i = end
+            continue
+        out.append(c)
+        i += 1
+    return ''.join(out)
+
+# Characters that Python's \s or \d match but Hyperscan's do not: its \s is
+# only [ \t\n\v\f\r] and its \d only [0-9], while re's cover every Unicode
+# space and decimal digit (e.g. fullwidth or Arabic-Indic digits)
+_NON_ASCII_CLASS = re.compile(r'[^\S \t\n\v\f\r]|[^\D0-9]')
+
+class Pattern:
+    """
+    A compiled regex that runs on RE2 for ASCII text and on Python's re otherwise.
+
+    RE2 matches in linear time without backtracking, but its \\b, \\w, \\d and
+    case folding are ASCII-only, so it is only used for ASCII text, with \\s
+    rewritten to re's ASCII whitespace. google-re2 copies the whole text on
+    every call, so only the single-call scans (finditer, sub) use it;
+    search and match, which callers repeat from advancing positions, use re.
+    Patterns RE2 cannot compile (e.g. lookbehind) always use re.
+    """
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.pattern = pattern
+        self.regex = re.compile(pattern, flags)
+        self.fast = None
+        fast_pattern = _re2_pattern(pattern) if re2 is not None and not flags & ~re.I else None
+        if fast_pattern is not None:
+            try:
+                self.fast = re2.compile(('(?i)' if flags & re.I else '') + fast_pattern)
+            except re2.error as e:
+                logger.debug(f"RE2 cannot compile {pattern[:50]!r}, using re: {e}")
+
+    def _engine(self, text: str):
+        return self.fast if self.fast is not None and text.isascii() else self.regex
+
+    def search(self, text: str, pos: int = 0):
+        return self.regex.search(text, pos)
+
+    def match(self, text: str, pos: int = 0):
+        return self.regex.match(text, pos)
+
+    def finditer(self, text: str, pos: int = 0):
+        return self._engine(text).finditer(text, pos)
+
+    def sub(self, repl, text: str, count: int = 0) -> str:
+        return self._engine(text).sub(repl, text, count)
+
+def compile_pattern(pattern: str, flags: int = 0) -> Pattern:
+    """Compile a regex, using RE2 when google-re2 is installed."""
+    return Pattern(pattern, flags)
+
+def merge_candidates(text: str, candidates: List[Tuple[int, int, int]], regex: Pattern,
+                     group_rules: Dict[str, int]) -> List[Tuple[int, int, int]]:
+    """
+    Merge precomputed hits with the matches of a union regex, as if the
+    candidates' rules were more alternatives of that regex.
+
+    Rules are numbered by priority; group_rules maps the regex's group names
+    to rule ids. candidates are (start, rule id, end) tuples sorted by start,
+    then rule id. Returns the leftmost-first, non-overlapping hits as
+    (start, end, rule id), preferring lower rule ids at the same start.
+    """
+    hits = []
+    pos = 0
+    i = 0
+    m = regex.search(text)
+    while True:
+        while i < len(candidates) and candidates[i][0] < pos:
+            i += 1
+        if m is not None and m.start() < pos:
+            m = regex.search(text, pos)
+        best = None
+        if m is not None:
+            best = (m.start(), group_rules[m.lastgroup], m.end())
+        if i < len(candidates) and (best is None or candidates[i] < best):
+            best = candidates[i]
+        if best is None:
+            break
+        start, rule_id, end = best
+        hits.append((start, end, rule_id))
+        pos = end
+    return hits
+
+class PatternSet:
+    """
+    Regexes compiled into one Hyperscan database and scanned in one pass.
+
+    A pattern's position is its priority. Results are the leftmost-first,
+    non-overlapping hits that the union regex of the patterns, in order,
+    would find. Hyperscan's \\b and case folding are ASCII-only, so scan()
+    takes ASCII text; callers that handle other text map the raw matches()
+    to character offsets themselves and pass them to resolve(). Its \\s and
+    \\d are ASCII-only too, so callers must check handles() first.
+    """
+
+    def __init__(self, patterns: List[str], flags: int = 0):
+        hs_flags = hyperscan.HS_FLAG_SOM_LEFTMOST
+        if flags & re.I:
+            hs_flags |= hyperscan.HS_FLAG_CASELESS
+        self.database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        self.database.compile(
+            expressions=[p.encode('utf-8') for p in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[hs_flags] * len(patterns),
+        )
+        # Scratch space is not thread-safe; each thread allocates its own
+        self._local = threading.local()
+        # Per-pattern regexes, used only to re-locate a hit whose leftmost
+        # start Hyperscan reported is not the one re would pick
+        self.pattern_regex = [compile_pattern(p, flags) for p in patterns]
+
+    @staticmethod
+    def handles(text: str) -> bool:
+        """False if text has whitespace or digits that \\s or \\d match in re but not in Hyperscan."""
+        return _NON_ASCII_CLASS.search(text) is None
+
+    def matches(self, data: bytes) -> Dict[Tuple[int, int], List[int]]:
+        """Scan data once; return the end offsets of all hits by (start, pattern id)."""
+        scratch = getattr(self._local, 'scratch', None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self.database)
+        hits = {}
+
+        def on_match(pattern_id, start, end, flags, context):
+            hits.setdefault((start, pattern_id), []).append(end)
+
+        self.database.scan(data, match_event_handler=on_match, scratch=scratch)
+        return hits
+
+    def resolve(self, text: str, candidates: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+        """
+        Reduce (start, pattern id, end) candidates, which may overlap, to the
+        leftmost-first, non-overlapping (start, end, pattern id) hits.
+        """
+        heap = list(candidates)
+        heapq.heapify(heap)
+        result = []
+        pos = 0
+        while heap:
+            start, pattern_id, end = heapq.heappop(heap)
+            if start < pos:
+                # Hyperscan only reports the leftmost start; re would resume
+                # scanning at pos and may still match this pattern further right
+                if end > pos:
+                    m = self.pattern_regex[pattern_id].search(text, pos)
+                    if m and m.start() < end:
+                        heapq.heappush(heap, (m.start(), pattern_id, m.end()))
+                continue
+            result.append((start, end, pattern_id))
+            pos = end
+        return result
+
+    def scan(self, text: str) -> List[Tuple[int, int, int]]:
+        """Find the hits in ASCII text as (start, end, pattern id)."""
+        hits = self.matches(text.encode('ascii'))
+        # Byte offsets are character offsets; keep the longest hit per
+        # (start, pattern), like a greedy regex would
+        return self.resolve(text, [(start, pattern_id, max(ends)) for (start, pattern_id), ends in hits.items()])
@@ -1,25 +1,69 @@
 import faiss
-import pickle
+import functools
+import sqlite3
+import threading
+import weakref
+import numpy as np
+import torch
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+from typing import List, Tuple
 from .logger import setup_logger
+from .embedder import get_model
 
 # Set up logger for this module
 logger = setup_logger("bank_llm.retrieval", "retrieval.log")
 
+EMBED_CACHE_SIZE = 1024  # Query embeddings kept per retriever
+RESULT_CACHE_SIZE = 256  # (query, k) search results kept per retriever
+
+def _encode(model, query: str) -> bytes:
+    # Stored as bytes: immutable, so a cached embedding cannot be modified
+    # convert_to_numpy fails on bf16 output before sentence-transformers
+    # 3.0, so take the tensor and widen it to float32 here
+    with torch.inference_mode():
+        emb = model.encode(query, convert_to_tensor=True)
+    return emb.float().cpu().numpy().tobytes()
+
+def _search(embed, index, meta: sqlite3.Connection, meta_lock: threading.Lock,
+            query: str, k: int) -> Tuple[str, ...]:
+    query_emb = np.frombuffer(embed(query), dtype=np.float32)
+    scores, indices = index.search(query_emb.reshape(1, -1), k)
+    ids = [int(i) for i in indices[0] if i >= 0]  # -1 pads when the index has fewer than k
+    with meta_lock:
+        rows = meta.execute(
+            f"SELECT id, text FROM meta WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+    texts = dict(rows)
+    return tuple(texts[i] for i in ids)
+
 class Retriever:
     def __init__(self):
-        self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self.model = get_model()
         self.index = faiss.read_index("vector_store/faiss.index")
-        with open("vector_store/meta.pkl", "rb") as f:
-            self.meta = pickle.load(f)
+        if hasattr(self.index, "hnsw"):
+            # Candidate list size per query: higher is more accurate, slower
+            self.index.hnsw.efSearch = 64
+        # Chunk texts stay in SQLite; only the ones a search returns are read.
+        # Searches run on the API's worker threads, which share this connection.
+        self.meta = sqlite3.connect("file:vector_store/meta.db?mode=ro", uri=True, check_same_thread=False)
+        self._meta_lock = threading.Lock()
+        # Repeated questions skip the model and the index. The caches belong
+        # to this instance, so a refreshed retriever starts with empty ones.
+        # They wrap plain functions rather than bound methods, so they do not
+        # reference the instance: a replaced retriever is freed once its last
+        # search returns, and its connection is closed then.
+        self._embed = functools.lru_cache(maxsize=EMBED_CACHE_SIZE)(functools.partial(_encode, self.model))
+        self._cached_search = functools.lru_cache(maxsize=RESULT_CACHE_SIZE)(
+            functools.partial(_search, self._embed, self.index, self.meta, self._meta_lock)
+        )
+        weakref.finalize(self, self.meta.close)
         logger.info("Retriever initialized successfully")
 
-    def search(self, query: str, k: int = 5):
+    def search(self, query: str, k: int = 5) -> List[str]:
         try:
-            query_emb = self.model.encode(query, convert_to_numpy=True)
-            scores, indices = self.index.search(query_emb.reshape(1, -1), k)
-            results = [self.meta[i] for i in indices[0]]
+            # MiniLM's tokenizer lowercases and splits on whitespace, so these
+            # variants of a question have the same embedding
+            results = list(self._cached_search(" ".join(query.lower().split()), k))
             logger.debug(f"Retrieved {len(results)} results for query: {query}")
             return results
         except Exception as e:
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from app import guardrails, numeric_pii, regex_engine
+
+# Each engine configuration _scan can dispatch to, by which optional
+# accelerators are switched off
+ENGINES = {
+    'default': {},
+    'no_hyperscan': {'hyperscan'},
+    'no_hyperscan_numba': {'hyperscan', 'numba'},
+    'no_hyperscan_ahocorasick': {'hyperscan', 'ahocorasick'},
+    'no_re2': {'re2'},
+    'pure_re': {'hyperscan', 'ahocorasick', 're2', 'numba'},
+}
+
+WHITESPACE = [' ', '\t', '\n', '\x0b', '\x0c', '\r', '\x1c', '\x1f', '\x85', '\xa0', ' ', '　']
+
+FRAGMENTS = [
+    'password', 'PIN', 'social security', 'account number', 'bank', 'Loan', 'tax id',
+    'swift code', 'idiot', 'f u c k', 's-h-i-t', '4111 1111 1111 1111', '123-45-6789',
+    '123456789', '(555) 123-4567', '+1 555 123 4567', '12345678901', 'john.doe@example.com',
+    'DEUTDEFF500', 'GB82WEST12345698765432', 'café 123456789', 'ñandú', 'pinpoint',
+    'ſecret', 'ıban', 'key', '.', '-', '(', '12', '1234',
+    '１２３-４５-６７８９', '５５５-１２３-４５６７', '٤١١١ ١١١١ ١١١١ ١١١١', '١', '１２',
+]
+
+@pytest.fixture(params=list(ENGINES))
+def engine(request, monkeypatch):
+    off = ENGINES[request.param]
+    if 'hyperscan' in off:
+        monkeypatch.setattr(guardrails, 'hyperscan', None)
+    if 'ahocorasick' in off:
+        monkeypatch.setattr(guardrails, 'ahocorasick', None)
+    if 're2' in off:
+        monkeypatch.setattr(regex_engine, 're2', None)
+    if 'numba' in off:
+        monkeypatch.setattr(numeric_pii, 'ENABLED', False)
+    return guardrails.ContentGuardrails()
+
+def reference_scan(g, text):
+    """What every engine must report: the combined regex run by Python's re."""
+    return [(m.start(), m.end(), g._group_rules[m.lastgroup]) for m in g.combined.regex.finditer(text)]
+
+@pytest.mark.parametrize('text', [
+    'SSN 123\xa045\xa06789',
+    '4111 1111 1111 1111',
+    'call 555\x85123\x854567',
+    'you i　d　i　o　t',
+    '123\x1c45\x1c6789',
+    'SSN 123\x0b45\x0b6789',
+    'My SSN is １２３-４５-６７８９ ok',
+    'call ５５５-１２３-４５６７',
+    'card ٤١١١ ١١١١ ١١١١ ١١١١',
+])
+def test_unusual_whitespace_separators(engine, text):
+    hits = engine._scan(text)
+    assert hits
+    assert hits == reference_scan(engine, text)
+
+def test_matches_combined_regex(engine):
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = ''.join(rng.choice(FRAGMENTS) + rng.choice(WHITESPACE + ['', ', ', '_'])
+                       for _ in range(rng.randint(0, 12)))
+        assert engine._scan(text) == reference_scan(engine, text), repr(text)
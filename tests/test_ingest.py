@@ -0,0 +1,109 @@
+import hashlib
+import io
+import json
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('sentence_transformers')
+
+from app import ingest
+
+DIM = 32
+
+class StubModel:
+    """Deterministic stand-in for the embedding model: one random unit vector per text."""
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, convert_to_tensor=False, **kwargs):
+        embs = np.stack([embed(t) for t in texts]) if texts else np.empty((0, DIM), np.float32)
+        return torch.from_numpy(embs) if convert_to_tensor else embs
+
+def embed(text):
+    seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+    v = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+def paragraphs(topic, n):
+    return '\n\n'.join(
+        f'{topic} paragraph {i}: customers can ask any branch of the bank about {topic} '
+        f'rates, fees and the documents needed to open one.'
+        for i in range(n)
+    )
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 5, 8, 64])
+def test_read_paragraphs_matches_split(tmp_path, monkeypatch, block_size):
+    monkeypatch.setattr(ingest, 'READ_BLOCK_SIZE', block_size)
+    rng = random.Random(block_size)
+    path = tmp_path / 'doc.txt'
+    for _ in range(200):
+        text = ''.join(rng.choice(['a', 'bc', ' ', '\n', '\n\n', '\n\n\n', '\r\n', '\r\n\r\n', 'é'])
+                       for _ in range(rng.randint(0, 30)))
+        path.write_bytes(text.encode('utf-8'))
+        expected = path.read_text(encoding='utf-8').split('\n\n')
+        assert list(ingest.read_paragraphs(path)) == expected, repr(text)
+
+def test_stream_json_matches_flatten_json():
+    pytest.importorskip('ijson')
+    data = {
+        'faq': [
+            {'q': 'What is the rate?', 'a': {'rate': 3.75, 'fee': 0.1, 'min': 100}},
+            {'q': 'Fees', 'a': [1e-07, 2.5e+20, -0.0, 12345678901234567890]},
+        ],
+        'nested': {'deep': {'deeper': [[1.5, None], [True, False]]}, '': {'empty': 'key'}},
+        'text': 'café ünïcode',
+    }
+    raw = json.dumps(data).encode('utf-8')
+    # ijson reads the non-integer numbers as Decimal; they must print as floats
+    assert list(ingest.stream_json(io.BytesIO(raw))) == list(ingest.flatten_json(json.loads(raw)))
+
+def stored(tmp_path):
+    index = ingest.faiss.read_index(str(tmp_path / ingest.INDEX_PATH))
+    with sqlite3.connect(tmp_path / ingest.META_PATH) as db:
+        rows = db.execute('SELECT id, text FROM meta ORDER BY id').fetchall()
+    db.close()
+    processed = set(json.loads((tmp_path / ingest.PROCESSED_PATH).read_text(encoding='utf-8')))
+    return index, rows, processed
+
+def test_build_then_add_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, 'get_model', StubModel)
+    data = tmp_path / 'data'
+    (data / 'uploads').mkdir(parents=True)
+    (data / 'savings.txt').write_text(paragraphs('savings', 20), encoding='utf-8')
+    (data / 'faq.json').write_text(json.dumps({'faq': [{'q': paragraphs('loans', 2)}]}), encoding='utf-8')
+
+    ingest.build_or_update_index(str(data))
+    index, rows, processed = stored(tmp_path)
+    built = len(rows)
+    assert built > 0 and index.ntotal == built
+    assert [i for i, _ in rows] == list(range(built))
+    assert processed == {str((data / name).resolve()) for name in ('savings.txt', 'faq.json')}
+
+    new = data / 'uploads' / 'mortgage.txt'
+    new.write_text(paragraphs('mortgage', 12), encoding='utf-8')
+    ingest.build_or_update_index(str(data / 'uploads'), [new])
+    index, rows, processed = stored(tmp_path)
+    added = len(rows)
+    assert added > built and index.ntotal == added
+    assert [i for i, _ in rows] == list(range(added))
+    assert str(new.resolve()) in processed
+    # Vector i is the embedding of chunk i
+    for i, text in rows:
+        _, ids = index.search(embed(text).reshape(1, -1), 1)
+        assert ids[0][0] == i
+
+    # The same file again, and a copy of it under another name, add nothing
+    ingest.build_or_update_index(str(data / 'uploads'), [new])
+    copy = data / 'uploads' / 'mortgage copy.txt'
+    copy.write_text(new.read_text(encoding='utf-8'), encoding='utf-8')
+    ingest.build_or_update_index(str(data / 'uploads'), [copy])
+    index, rows, processed = stored(tmp_path)
+    assert len(rows) == added and index.ntotal == added
+    assert len({text for _, text in rows}) == added
+    assert str(copy.resolve()) in processed